@@ -0,0 +1,69 @@
+"""
+Helpers shared by the catalog scripts
+
+Importing this module also configures ReportLab for all of them.
+"""
+
+import re
+from typing import Any, Tuple
+
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+
+
+# ReportLab ASCII85-wraps embedded image streams by default, which makes
+# them about 25% larger; store JPEG data as plain /DCTDecode instead
+rl_config.useA85 = 0
+
+# Quality used when a JPEG has to be decoded and embedded again; those are
+# also saved with optimized Huffman tables, which shrinks them losslessly
+JPEG_REENCODE_QUALITY = 85
+
+# EXIF orientations that are pure rotations, mapped to the counter-clockwise
+# angle that displays the stored pixels upright
+EXIF_ROTATIONS = {3: 180, 6: 270, 8: 90}
+
+# Splits names into text and digit runs so "page_2" sorts before "page_10"
+NATURAL_SORT_SPLIT = re.compile(r"(\d+)")
+
+
+def natural_sort_key(name: str) -> Tuple[Any, ...]:
+    """Case-insensitive sort key that compares embedded numbers numerically."""
+    return tuple(int(part) if part.isdigit() else part
+                 for part in NATURAL_SORT_SPLIT.split(name.lower()))
+
+
+def draw_rotated_image(c: canvas.Canvas, image, x: float, y: float,
+                       width: float, height: float, rotation: int) -> None:
+    """
+    Draw an image so that, after rotation, it fills the given box.
+
+    Args:
+        c: Canvas to draw on
+        image: Anything drawImage accepts (file name or ImageReader)
+        x, y: Bottom-left corner of the box on the page
+        width, height: Size of the box, i.e. of the image as displayed
+        rotation: Counter-clockwise angle (0, 90, 180 or 270) that turns
+            the stored image upright
+    """
+    if rotation == 0:
+        c.drawImage(image, x, y, width, height)
+        return
+
+    # Move the origin to the corner that the stored image's
+    # bottom-left lands on, then rotate into place
+    c.saveState()
+    try:
+        if rotation == 90:
+            c.translate(x + width, y)
+        elif rotation == 180:
+            c.translate(x + width, y + height)
+        else:
+            c.translate(x, y + height)
+        c.rotate(rotation)
+        if rotation == 180:
+            c.drawImage(image, 0, 0, width, height)
+        else:
+            c.drawImage(image, 0, 0, height, width)
+    finally:
+        c.restoreState()
@@ -9,16 +9,19 @@ image sizing, and metadata.
 Author: AI Assistant
 """
 
+import io
 import os
 import sys
 import argparse
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 from PIL import Image, ImageOps
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 
+from catalog_utils import JPEG_REENCODE_QUALITY, natural_sort_key
+
 
 class ImageToPDFConverter:
     """Convert images to PDF for catalog purposes."""
@@ -60,45 +63,110 @@ class ImageToPDFConverter:
         if not maintain_aspect:
             return max_width, max_height
         
-        # Calculate aspect ratios
-        img_aspect = img_width / img_height
-        max_aspect = max_width / max_height
+        if img_width <= 0 or img_height <= 0:
+            raise ValueError(f"Invalid image size {img_width}x{img_height}")
         
-        if img_aspect > max_aspect:
-            # Image is wider than available space
-            width = max_width
-            height = max_width / img_aspect
-        else:
-            # Image is taller than available space
-            height = max_height
-            width = max_height * img_aspect
+        # Scale by whichever side runs out of room first
+        scale = min(max_width / img_width, max_height / img_height)
+        return img_width * scale, img_height * scale
+    
+    def prepare_image(self, source: Image.Image,
+                      max_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """
+        Decode an opened image into an upright RGB image for PDF conversion.
+        
+        Args:
+            source: Image opened with Image.open; the caller closes it
+            max_size: Largest (width, height) in pixels worth embedding
             
-        return width, height
+        Returns:
+            Processed PIL Image, independent of source
+        """
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that still
+        # covers max_size; the side is squared as EXIF may rotate it
+        if max_size is not None and source.format == 'JPEG':
+            draft_side = max(max_size)
+            source.draft('RGB', (draft_side, draft_side))
+        
+        # Decode once up front so ImageReader works from memory, not the file
+        source.load()
+        
+        # Convert to RGB if necessary (for PDF compatibility). Transparent
+        # images are flattened onto white; a plain convert would drop the
+        # alpha and expose whatever color the hidden pixels hold
+        if source.mode in ('RGBA', 'LA') or (source.mode == 'P'
+                                             and 'transparency' in source.info):
+            rgba = source.convert('RGBA') if source.mode != 'RGBA' else source
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel('A'))
+        elif source.mode != 'RGB':
+            img = source.convert('RGB')
+        else:
+            img = source
+        
+        # Auto-orient based on EXIF data; this always hands back a new image,
+        # so the result outlives source
+        img = ImageOps.exif_transpose(img)
+        
+        # Downscale images with more pixels than the page can show
+        if max_size is not None and (img.width > max_size[0] * 1.1
+                                     or img.height > max_size[1] * 1.1):
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        
+        return img
     
-    def process_image(self, image_path: Path) -> Image.Image:
+    def process_image(self, image_path: Path,
+                      max_size: Optional[Tuple[int, int]] = None) -> Image.Image:
         """
         Process and prepare an image for PDF conversion.
         
         Args:
             image_path: Path to the image file
+            max_size: Largest (width, height) in pixels worth embedding
             
         Returns:
             Processed PIL Image
         """
         try:
-            img = Image.open(image_path)
+            # The file and the decoded source are released when the block ends
+            with Image.open(image_path) as source:
+                return self.prepare_image(source, max_size)
             
-            # Convert to RGB if necessary (for PDF compatibility)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+        except Exception as e:
+            raise ValueError(f"Error processing image {image_path}: {e}")
+    
+    def load_image_source(self, image_path: Path,
+                          max_size: Optional[Tuple[int, int]] = None) -> Tuple[Any, int, int]:
+        """
+        Prepare an image for drawImage, keeping JPEGs as JPEG data in the PDF.
+        
+        Args:
+            image_path: Path to the image file
+            max_size: Largest (width, height) in pixels worth embedding
             
-            # Auto-orient based on EXIF data
-            img = ImageOps.exif_transpose(img)
+        Returns:
+            Tuple of (drawImage source, width, height)
+        """
+        # One handle serves both the header probe and, if needed, the decode
+        with Image.open(image_path) as source:
+            is_jpeg = source.format == 'JPEG'
+            if (is_jpeg and source.mode in ('RGB', 'L')
+                    and source.getexif().get(0x0112, 1) == 1):
+                # Already upright: ReportLab embeds the file's JPEG stream as-is
+                return str(image_path), source.width, source.height
             
-            return img
+            img = self.prepare_image(source, max_size)
+        
+        if is_jpeg:
+            # Embed decoded JPEGs as JPEG again instead of a raw Flate bitmap
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=JPEG_REENCODE_QUALITY, optimize=True)
+            buffer.seek(0)
             
-        except Exception as e:
-            raise ValueError(f"Error processing image {image_path}: {e}")
+            # Only the encoded copy is needed from here on
+            img.close()
+            return ImageReader(buffer), img.width, img.height
+        return ImageReader(img), img.width, img.height
     
     def create_pdf(self, image_paths: List[Path], output_path: Path,
                    layout: str = "single", images_per_page: int = 1,
@@ -117,16 +185,34 @@ class ImageToPDFConverter:
         c = canvas.Canvas(str(output_path), pagesize=self.page_size)
         usable_width, usable_height = self.get_usable_area()
         
+        if layout == "single":
+            max_img_width, max_img_height = usable_width, usable_height
+        else:
+            # Grid geometry is the same for every image, so work it out once
+            cols = int(images_per_page ** 0.5)
+            rows = (images_per_page + cols - 1) // cols
+            
+            cell_width = usable_width / cols
+            cell_height = usable_height / rows
+            
+            # Calculate image size within cell
+            padding = 10  # 10 points padding
+            max_img_width = cell_width - (2 * padding)
+            max_img_height = cell_height - (2 * padding)
+        
+        # Largest image worth embedding, in pixels, at the output DPI
+        max_size = (int(max_img_width / 72 * dpi), int(max_img_height / 72 * dpi))
+        
         current_page_images = 0
         
         for i, image_path in enumerate(image_paths):
             try:
-                img = self.process_image(image_path)
+                img_source, source_width, source_height = self.load_image_source(image_path, max_size)
                 
                 if layout == "single":
                     # One image per page
                     img_width, img_height = self.calculate_image_size(
-                        img.width, img.height, usable_width, usable_height, maintain_aspect
+                        source_width, source_height, usable_width, usable_height, maintain_aspect
                     )
                     
                     # Center the image
@@ -134,34 +220,18 @@ class ImageToPDFConverter:
                     y = self.margin + (usable_height - img_height) / 2
                     
                     # Add image to page
-                    img_reader = ImageReader(img)
-                    c.drawImage(img_reader, x, y, img_width, img_height)
+                    c.drawImage(img_source, x, y, img_width, img_height)
                     c.showPage()
                     current_page_images = 0
                     
                 elif layout in ["grid", "catalog"]:
                     # Multiple images per page
-                    if current_page_images == 0:
-                        # Start new page
-                        current_page_images = 0
-                    
                     # Calculate grid position
-                    cols = int(images_per_page ** 0.5)
-                    rows = (images_per_page + cols - 1) // cols
-                    
-                    cell_width = usable_width / cols
-                    cell_height = usable_height / rows
-                    
                     row = current_page_images // cols
                     col = current_page_images % cols
                     
-                    # Calculate image size within cell
-                    padding = 10  # 10 points padding
-                    max_img_width = cell_width - (2 * padding)
-                    max_img_height = cell_height - (2 * padding)
-                    
                     img_width, img_height = self.calculate_image_size(
-                        img.width, img.height, max_img_width, max_img_height, maintain_aspect
+                        source_width, source_height, max_img_width, max_img_height, maintain_aspect
                     )
                     
                     # Position image in cell
@@ -169,14 +239,13 @@ class ImageToPDFConverter:
                     y = self.page_height - self.margin - ((row + 1) * cell_height) + (cell_height - img_height) / 2
                     
                     # Add image
-                    img_reader = ImageReader(img)
-                    c.drawImage(img_reader, x, y, img_width, img_height)
+                    c.drawImage(img_source, x, y, img_width, img_height)
                     
                     # Add filename as caption (catalog mode)
                     if layout == "catalog":
                         caption_y = y - 15
                         c.setFont("Helvetica", 8)
-                        c.drawCentredText(x + img_width/2, caption_y, image_path.stem)
+                        c.drawCentredString(x + img_width/2, caption_y, image_path.stem)
                     
                     current_page_images += 1
                     
@@ -215,23 +284,15 @@ class ImageToPDFConverter:
         if image_extensions is None:
             image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif']
         
-        # Find all image files
-        image_paths = []
-        for ext in image_extensions:
-            image_paths.extend(input_dir.glob(f"*{ext}"))
-            image_paths.extend(input_dir.glob(f"*{ext.upper()}"))
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_image_paths = []
-        for file in image_paths:
-            if file not in seen:
-                seen.add(file)
-                unique_image_paths.append(file)
-        image_paths = unique_image_paths
+        # Find all image files in a single directory pass; extensions match
+        # in any case, so no file can be listed twice
+        extensions = {ext.lower() for ext in image_extensions}
+        with os.scandir(input_dir) as entries:
+            image_paths = [Path(entry.path) for entry in entries
+                           if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions]
         
-        # Sort images alphabetically
-        image_paths.sort(key=lambda x: x.name.lower())
+        # Sort images alphabetically, comparing embedded numbers numerically
+        image_paths.sort(key=lambda x: natural_sort_key(x.name))
         
         if not image_paths:
             raise ValueError(f"No images found in {input_dir}")
@@ -10,31 +10,50 @@ Usage:
     python jpg_to_pdf_converter.py
     python jpg_to_pdf_converter.py -d /path/to/images
     python jpg_to_pdf_converter.py -d photos -o output_folder
+    python jpg_to_pdf_converter.py -d photos -s catalog.pdf
 """
 
+import io
+import itertools
 import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image, ImageOps
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 
+from catalog_utils import EXIF_ROTATIONS, JPEG_REENCODE_QUALITY, draw_rotated_image, natural_sort_key
+
 
 class JPGToPDFConverter:
     """Convert JPG images to letter-sized PDF files."""
     
-    def __init__(self, margin_inches: float = 0.5):
+    def __init__(self, margin_inches: float = 0.5, workers: int = None, max_dpi: int = 300):
         """
         Initialize the converter.
         
         Args:
             margin_inches: Margin around the image in inches
+            workers: Number of processes converting images, or of threads
+                loading them for a single PDF (default: one per CPU)
+            max_dpi: Highest resolution images are embedded at on the page
         """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_dpi = max_dpi
         self.page_size = letter
         self.page_width, self.page_height = self.page_size
         self.margin = margin_inches * 72  # Convert inches to points
         
+        # Page geometry is fixed per converter, so work it out once
+        self.usable_width = self.page_width - (2 * self.margin)
+        self.usable_height = self.page_height - (2 * self.margin)
+        self.page_aspect = self.usable_width / self.usable_height
+        self.center_x = self.margin + self.usable_width / 2
+        self.center_y = self.margin + self.usable_height / 2
+        
     def calculate_image_size(self, img_width: int, img_height: int) -> tuple:
         """
         Calculate the optimal size for an image on a letter-sized page.
@@ -46,58 +65,111 @@ class JPGToPDFConverter:
         Returns:
             Tuple of (width, height) in points for the PDF
         """
-        # Usable area after margins
-        usable_width = self.page_width - (2 * self.margin)
-        usable_height = self.page_height - (2 * self.margin)
-        
-        # Calculate aspect ratios
         img_aspect = img_width / img_height
-        page_aspect = usable_width / usable_height
         
-        if img_aspect > page_aspect:
+        if img_aspect > self.page_aspect:
             # Image is wider than the page ratio - fit to width
-            pdf_width = usable_width
-            pdf_height = usable_width / img_aspect
+            pdf_width = self.usable_width
+            pdf_height = self.usable_width / img_aspect
         else:
             # Image is taller than the page ratio - fit to height
-            pdf_height = usable_height
-            pdf_width = usable_height * img_aspect
+            pdf_height = self.usable_height
+            pdf_width = self.usable_height * img_aspect
             
         return pdf_width, pdf_height
     
-    def convert_image_to_pdf(self, image_path: Path, output_path: Path) -> bool:
+    def load_page_image(self, image_path: Path) -> tuple:
         """
-        Convert a single JPG image to a letter-sized PDF.
+        Load a JPG image and work out how it is placed on the page.
         
         Args:
             image_path: Path to the JPG image
-            output_path: Path for the output PDF file
             
         Returns:
-            True if successful, False otherwise
+            Tuple of (drawImage source, width, height, rotation); width and
+            height are in points as displayed, rotation in degrees
         """
-        try:
-            # Open and process the image
-            img = Image.open(image_path)
+        # The file and decoded source are released before returning
+        with Image.open(image_path) as source:
+            orientation = source.getexif().get(0x0112, 1)
+            if (source.format == 'JPEG' and source.mode in ('RGB', 'L')
+                    and (orientation == 1 or orientation in EXIF_ROTATIONS)):
+                # ReportLab copies the file's JPEG data into the PDF as-is, so
+                # there is nothing to decode or re-encode; EXIF rotation is
+                # applied by the page transform instead of the pixels
+                rotation = EXIF_ROTATIONS.get(orientation, 0)
+                img_width, img_height = source.size
+                if rotation in (90, 270):
+                    img_width, img_height = img_height, img_width  # Displayed size
+                pdf_width, pdf_height = self.calculate_image_size(img_width, img_height)
+                return str(image_path), pdf_width, pdf_height, rotation
+            
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that still
+            # leaves max_dpi across the usable area (either orientation)
+            if source.format == 'JPEG':
+                draft_side = int(max(self.usable_width, self.usable_height) / 72 * self.max_dpi)
+                source.draft('RGB', (draft_side, draft_side))
             
             # Convert to RGB if necessary
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+            img = source.convert('RGB') if source.mode != 'RGB' else source
             
-            # Auto-orient based on EXIF data
-            img = ImageOps.exif_transpose(img)
+            # Auto-orient based on EXIF data; the orientation was already read
+            # from the header, and exif_transpose would copy even upright images
+            if orientation != 1:
+                img = ImageOps.exif_transpose(img)
             
             # Calculate optimal size for the PDF
             pdf_width, pdf_height = self.calculate_image_size(img.width, img.height)
             
-            # Calculate position to center the image
-            x = self.margin + (self.page_width - (2 * self.margin) - pdf_width) / 2
-            y = self.margin + (self.page_height - (2 * self.margin) - pdf_height) / 2
+            # Don't embed more pixels than the page shows at max_dpi
+            target_px = (int(pdf_width / 72 * self.max_dpi), int(pdf_height / 72 * self.max_dpi))
+            if img.width > target_px[0] or img.height > target_px[1]:
+                img = img.resize(target_px, Image.Resampling.LANCZOS)
+            
+            # Hand ReportLab JPEG bytes rather than the bitmap: the page gets a
+            # compact /DCTDecode image instead of Flate-compressed raw pixels,
+            # and the decoded pixels are freed here instead of being held
+            # until the page is drawn
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=JPEG_REENCODE_QUALITY, optimize=True)
+            if img is not source:
+                img.close()
+            buffer.seek(0)
+            return ImageReader(buffer), pdf_width, pdf_height, 0
+    
+    def draw_image_page(self, c: canvas.Canvas, image_path: Path, page_image: tuple = None) -> None:
+        """
+        Draw a JPG image, fitted and centered, on the current canvas page.
+        
+        Args:
+            c: Canvas to draw on
+            image_path: Path to the JPG image
+            page_image: Result of load_page_image, if already loaded
+        """
+        if page_image is None:
+            page_image = self.load_page_image(image_path)
+        image, pdf_width, pdf_height, rotation = page_image
+        
+        # Calculate position to center the image
+        x = self.center_x - pdf_width / 2
+        y = self.center_y - pdf_height / 2
+        
+        draw_rotated_image(c, image, x, y, pdf_width, pdf_height, rotation)
+    
+    def convert_image_to_pdf(self, image_path: Path, output_path: Path) -> bool:
+        """
+        Convert a single JPG image to a letter-sized PDF.
+        
+        Args:
+            image_path: Path to the JPG image
+            output_path: Path for the output PDF file
             
-            # Create PDF
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
             c = canvas.Canvas(str(output_path), pagesize=self.page_size)
-            img_reader = ImageReader(img)
-            c.drawImage(img_reader, x, y, pdf_width, pdf_height)
+            self.draw_image_page(c, image_path)
             c.save()
             
             print(f"✓ Converted: {image_path.name} -> {output_path.name}")
@@ -107,6 +179,23 @@ class JPGToPDFConverter:
             print(f"✗ Error converting {image_path.name}: {e}")
             return False
     
+    def find_jpg_files(self, input_folder: Path) -> list:
+        """
+        Find the JPG images in a folder.
+        
+        Args:
+            input_folder: Folder containing JPG images
+            
+        Returns:
+            JPG file paths sorted by name, comparing embedded numbers numerically
+        """
+        # One directory pass; suffixes match in any case, so no file is listed twice
+        with os.scandir(input_folder) as entries:
+            jpg_files = [Path(entry.path) for entry in entries
+                         if entry.is_file() and entry.name.lower().endswith(('.jpg', '.jpeg'))]
+        jpg_files.sort(key=lambda path: natural_sort_key(path.name))
+        return jpg_files
+    
     def convert_folder(self, input_folder: Path, output_folder: Path = None) -> None:
         """
         Convert all JPG images in a folder to individual PDF files.
@@ -122,39 +211,98 @@ class JPGToPDFConverter:
         output_folder.mkdir(parents=True, exist_ok=True)
         
         # Find all JPG files
-        jpg_files = []
-        for pattern in ["*.jpg", "*.jpeg"]:
-            jpg_files.extend(input_folder.glob(pattern))
-            jpg_files.extend(input_folder.glob(pattern.upper()))
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_jpg_files = []
-        for file in jpg_files:
-            if file not in seen:
-                seen.add(file)
-                unique_jpg_files.append(file)
-        jpg_files = unique_jpg_files
-        
-        if not jpg_files:
+        jpg_paths = self.find_jpg_files(input_folder)
+        
+        if not jpg_paths:
             print(f"No JPG files found in {input_folder}")
             return
         
-        print(f"Found {len(jpg_files)} JPG files")
+        print(f"Found {len(jpg_paths)} JPG files")
         print(f"Converting to letter-sized PDF files...")
         
+        # Each image becomes its own PDF, so the conversions are independent
+        pdf_paths = [output_folder / (jpg_path.stem + ".pdf") for jpg_path in jpg_paths]
+        
+        workers = min(self.workers, len(jpg_paths))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.convert_image_to_pdf, jpg_paths, pdf_paths,
+                                            chunksize=4))
+        else:
+            # Not worth spawning a pool for a single worker
+            results = list(map(self.convert_image_to_pdf, jpg_paths, pdf_paths))
+        success_count = sum(results)
+        
+        print(f"\nConversion complete: {success_count}/{len(jpg_paths)} files converted")
+        print(f"PDF files saved to: {output_folder}")
+    
+    def convert_folder_to_single_pdf(self, input_folder: Path, output_path: Path) -> bool:
+        """
+        Convert all JPG images in a folder into one multi-page PDF.
+        
+        Every image is drawn on its own page of a single canvas, so there
+        are no per-image PDFs to write and merge afterwards.
+        
+        Args:
+            input_folder: Folder containing JPG images
+            output_path: Path for the output PDF file
+            
+        Returns:
+            True if at least one page was written, False otherwise
+        """
+        jpg_paths = self.find_jpg_files(input_folder)
+        
+        if not jpg_paths:
+            print(f"No JPG files found in {input_folder}")
+            return False
+        
+        print(f"Found {len(jpg_paths)} JPG files")
+        print(f"Converting to a single letter-sized PDF...")
+        
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        c = canvas.Canvas(str(output_path), pagesize=self.page_size)
         success_count = 0
-        for jpg_path in sorted(jpg_files):
-            # Create output PDF filename
-            pdf_filename = jpg_path.stem + ".pdf"
-            pdf_path = output_folder / pdf_filename
+        
+        # Threads load the next few images (Pillow releases the GIL while
+        # decoding) while this thread draws pages in order; the lookahead
+        # bounds how many loaded images are held at once
+        lookahead = 2 * self.workers
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            jpg_iter = iter(jpg_paths)
+            for jpg_path in itertools.islice(jpg_iter, lookahead):
+                pending.append((jpg_path, executor.submit(self.load_page_image, jpg_path)))
             
-            # Convert the image
-            if self.convert_image_to_pdf(jpg_path, pdf_path):
-                success_count += 1
+            while pending:
+                jpg_path, future = pending.popleft()
+                next_path = next(jpg_iter, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(self.load_page_image, next_path)))
+                try:
+                    page_image = future.result()
+                except Exception as e:
+                    # Nothing was drawn, so the current page is still empty
+                    print(f"✗ Error converting {jpg_path.name}: {e}")
+                    continue
+                try:
+                    self.draw_image_page(c, jpg_path, page_image)
+                    success_count += 1
+                    print(f"✓ Added: {jpg_path.name}")
+                except Exception as e:
+                    print(f"✗ Error converting {jpg_path.name}: {e}")
+                finally:
+                    # Drawing may have started before it failed; the next
+                    # image must not land on this page either way
+                    c.showPage()
         
-        print(f"\nConversion complete: {success_count}/{len(jpg_files)} files converted")
-        print(f"PDF files saved to: {output_folder}")
+        if success_count == 0:
+            print("✗ No images could be converted")
+            return False
+        
+        c.save()
+        print(f"\nConversion complete: {success_count}/{len(jpg_paths)} images added")
+        print(f"PDF saved to: {output_path}")
+        return True
 
 
 def main():
@@ -174,6 +322,9 @@ Examples:
   
   # Convert and save PDFs to a different folder
   python jpg_to_pdf_converter.py -d photos -o pdf_output
+  
+  # Put all images into one multi-page PDF
+  python jpg_to_pdf_converter.py -d photos -s catalog.pdf
         """
     )
     
@@ -183,6 +334,13 @@ Examples:
                         help="Output directory for PDF files (default: same as input)")
     parser.add_argument("-m", "--margin", type=float, default=0.5,
                         help="Margin around image in inches (default: 0.5)")
+    parser.add_argument("-s", "--single", type=str, metavar="FILENAME",
+                        help="Write all images into one PDF with this name instead of one PDF per image")
+    parser.add_argument("--max-dpi", type=int, default=300,
+                        help="Downscale decoded images above this resolution on the page (default: 300)")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="Number of processes used to convert images, or of threads loading "
+                             "them with -s (default: one per CPU)")
     
     args = parser.parse_args()
     
@@ -196,13 +354,26 @@ Examples:
         print(f"Error: {input_dir} is not a directory")
         sys.exit(1)
     
+    if args.max_dpi < 1:
+        print("Error: max-dpi must be at least 1")
+        sys.exit(1)
+    
+    if args.workers is not None and args.workers < 1:
+        print("Error: workers must be at least 1")
+        sys.exit(1)
+    
     # Set output directory
     output_dir = Path(args.output) if args.output else input_dir
     
     # Create converter and process
     try:
-        converter = JPGToPDFConverter(margin_inches=args.margin)
-        converter.convert_folder(input_dir, output_dir)
+        converter = JPGToPDFConverter(margin_inches=args.margin, workers=args.workers,
+                                      max_dpi=args.max_dpi)
+        if args.single:
+            if not converter.convert_folder_to_single_pdf(input_dir, output_dir / args.single):
+                sys.exit(1)
+        else:
+            converter.convert_folder(input_dir, output_dir)
         
     except KeyboardInterrupt:
         print("\nConversion cancelled by user")
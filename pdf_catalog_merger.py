@@ -5,46 +5,108 @@ Working fix for blank page issue - direct approach
 
 import os
 import sys
-import io
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 import argparse
+import contextlib
+import hashlib
+import io
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-
-# Import PyPDF2 with warnings suppressed
 import warnings
-with warnings.catch_warnings():
-    from PyPDF2 import PdfReader, PdfWriter
-
-try:
-    import pikepdf
-except Exception:
-    pikepdf = None
+import zlib
 
 try:
     from PIL import Image, ImageOps
     from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import ImageReader
     from reportlab.pdfgen import canvas
 except ImportError as e:
     print(f"Error: Missing required library. Install with: pip install PyPDF2 Pillow reportlab")
     print(f"Specific error: {e}")
     sys.exit(1)
 
+from catalog_utils import EXIF_ROTATIONS, JPEG_REENCODE_QUALITY, draw_rotated_image, natural_sort_key
+
+# Upper bound on images drawn into one intermediate PDF, since the canvas
+# keeps every embedded image in memory until it is saved
+JPG_PAGES_PER_BATCH = 50
+
+# Intermediate page PDFs are kept in memory when the JPGs they embed add up
+# to no more than this; larger catalogs go through a temp folder instead
+IN_MEMORY_JPG_LIMIT = 256 << 20
+
+# Merge inputs: PDF files on disk, or generated PDFs held in memory. In-memory
+# PDFs carry a .name so they can be logged like files
+PdfSource = Union[Path, io.BytesIO]
+
+# Merge outputs: a file path, or any writable binary stream (e.g. a response
+# body) that the catalog is written to as it is produced
+PdfOutput = Union[Path, BinaryIO]
+
+
+def pikepdf_available() -> bool:
+    """Check that pikepdf imports, not just that it is installed.
+
+    The merge engines are imported by the method that uses them, so a run
+    only loads the one it needs. pikepdf can be installed yet fail to load
+    (e.g. a missing libqpdf), which must not stop the PyPDF2 fallback.
+    """
+    try:
+        import pikepdf  # noqa: F401
+    except Exception:
+        return False
+    return True
+
 
 class WorkingFixPDFCatalogMerger:
     """Working fix PDF catalog merger with PyPDF2."""
     
-    def __init__(self):
-        """Initialize the working fix PDF catalog merger."""
+    def __init__(self, cache_dir: Optional[Path] = None, workers: Optional[int] = None,
+                 target_dpi: int = 300):
+        """Initialize the working fix PDF catalog merger.
+
+        Converted JPG pages and generated covers are kept in cache_dir (when
+        given) and reused on later runs until their inputs change. JPGs are converted by up
+        to `workers` processes (default: one per CPU). Images that have to be
+        decoded are downscaled to about target_dpi on the page.
+        """
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.target_dpi = target_dpi
         self.cover_filename = "cover.pdf"
         self.back_cover_filename = "back_cover.pdf"
         self.page_size = letter
         self.page_width, self.page_height = self.page_size
         self.margin = 0.5 * 72  # 0.5 inches in points
+        self.usable_width = self.page_width - (2 * self.margin)
+        self.usable_height = self.page_height - (2 * self.margin)
+        self.page_aspect = self.usable_width / self.usable_height
+        # Largest image, in pixels, that the usable area shows at target_dpi
+        self.target_width = int(self.usable_width / 72 * target_dpi)
+        self.target_height = int(self.usable_height / 72 * target_dpi)
     
     def create_simple_cover(self, output_path: Path, title: str) -> bool:
-        """Create a simple cover page with text."""
+        """Create a simple cover page with text.
+
+        A cover only depends on its title, the page size and today's date, so
+        with a cache_dir it is rendered once per day and copied after that.
+        """
+        subtitle = f"Generated on {datetime.now().strftime('%Y-%m-%d')}"
+        cached_cover = None
+        if self.cache_dir is not None:
+            # Only the user's own cache directory is trusted as a cover source
+            cover_key = hashlib.blake2b(f"{title}|{subtitle}|{self.page_size}".encode("utf-8"),
+                                        digest_size=16).hexdigest()
+            cached_cover = self.cache_dir / "covers" / f"{cover_key}.pdf"
+        
         try:
+            if cached_cover is not None and cached_cover.exists():
+                shutil.copyfile(cached_cover, output_path)
+                return True
+            
             c = canvas.Canvas(str(output_path), pagesize=self.page_size)
             
             # Set font and size
@@ -60,30 +122,63 @@ class WorkingFixPDFCatalogMerger:
             
             # Add subtitle
             c.setFont("Helvetica", 24)
-            subtitle = f"Generated on {datetime.now().strftime('%Y-%m-%d')}"
             subtitle_width = c.stringWidth(subtitle, "Helvetica", 24)
             subtitle_x = (self.page_width - subtitle_width) / 2
             c.drawString(subtitle_x, y - 50, subtitle)
             
             c.save()
-            return True
             
         except Exception as e:
             print(f"✗ Error creating cover: {e}")
             return False
+        
+        if cached_cover is None:
+            return True
+        
+        # Populating the cache is best effort; write aside, then swap in atomically
+        try:
+            cached_cover.parent.mkdir(parents=True, exist_ok=True)
+            partial_cover = cached_cover.with_suffix(f".{os.getpid()}.tmp")
+            shutil.copyfile(output_path, partial_cover)
+            os.replace(partial_cover, cached_cover)
+        except OSError as e:
+            print(f"⚠ Could not cache cover: {e}")
+        return True
     
-    def find_cover_files(self, directory: Path) -> Tuple[Optional[Path], Optional[Path]]:
-        """Find cover and back cover files in the directory."""
-        cover_path = None
-        back_cover_path = None
+    def scan_directory(self, directory: Path) -> Dict[str, Any]:
+        """Classify directory files into cover, back cover, JPGs and PDFs in one pass."""
+        scan = {"cover": None, "back_cover": None, "jpgs": [], "pdfs": [], "entries": {}}
+        cover_name = self.cover_filename.lower()
+        back_cover_name = self.back_cover_filename.lower()
         
-        # Check for cover files (case insensitive)
-        for file in directory.iterdir():
-            if file.is_file() and file.suffix.lower() == '.pdf':
-                if file.name.lower() == self.cover_filename.lower():
-                    cover_path = file
-                elif file.name.lower() == self.back_cover_filename.lower():
-                    back_cover_path = file
+        # DirEntry.is_file() reuses the readdir file type, no extra stat
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                
+                # Match names case insensitively
+                name = entry.name.lower()
+                if name == cover_name:
+                    scan["cover"] = Path(entry.path)
+                elif name == back_cover_name:
+                    scan["back_cover"] = Path(entry.path)
+                elif name.endswith(('.jpg', '.jpeg')):
+                    scan["jpgs"].append(Path(entry.path))
+                    scan["entries"][scan["jpgs"][-1]] = entry
+                elif name.endswith('.pdf'):
+                    scan["pdfs"].append(Path(entry.path))
+                    scan["entries"][scan["pdfs"][-1]] = entry
+        
+        return scan
+    
+    def find_cover_files(self, directory: Path,
+                         scan: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Path], Optional[Path]]:
+        """Find cover and back cover files in the directory."""
+        if scan is None:
+            scan = self.scan_directory(directory)
+        cover_path = scan["cover"]
+        back_cover_path = scan["back_cover"]
         
         # Create cover if not found
         if cover_path is None:
@@ -109,140 +204,361 @@ class WorkingFixPDFCatalogMerger:
         
         return cover_path, back_cover_path
     
-    def convert_jpg_to_pdf_working(self, jpg_path: Path, output_path: Path) -> bool:
-        """Convert a JPG image to a letter-sized PDF using working method."""
-        try:
-            # Open and process the image
-            img = Image.open(jpg_path)
+    def draw_image_page(self, c: canvas.Canvas, image, img_width: float, img_height: float,
+                        rotation: int = 0) -> None:
+        """Draw an image fitted and centered within the page margins.
+
+        img_width/img_height are the displayed dimensions; rotation is the
+        counter-clockwise angle applied to the stored image to display it.
+        """
+        img_aspect = img_width / img_height
+        
+        if img_aspect > self.page_aspect:
+            pdf_width = self.usable_width
+            pdf_height = self.usable_width / img_aspect
+        else:
+            pdf_height = self.usable_height
+            pdf_width = self.usable_height * img_aspect
+        
+        # Calculate position to center the image
+        x = self.margin + (self.usable_width - pdf_width) / 2
+        y = self.margin + (self.usable_height - pdf_height) / 2
+        
+        draw_rotated_image(c, image, x, y, pdf_width, pdf_height, rotation)
+    
+    def load_jpg_page(self, jpg_path: Path) -> Tuple[Union[str, bytes], int, int, int]:
+        """Work out how a JPG is embedded, without touching any canvas.
+
+        Upright RGB/grayscale JPEGs are embedded byte-for-byte as a /DCTDecode
+        image, so the source is the file name; anything else is decoded with
+        Pillow and the source is the re-encoded JPEG data. Returns (source,
+        displayed width, displayed height, rotation).
+        """
+        # One handle serves the format, size and EXIF probe and, if needed,
+        # the decode; none of the probes reads pixel data
+        with Image.open(jpg_path) as img:
+            orientation = img.getexif().get(0x0112, 1)
+            
+            if (img.format == 'JPEG' and img.mode in ('RGB', 'L')
+                    and (orientation == 1 or orientation in EXIF_ROTATIONS)):
+                # ReportLab copies the JPEG stream from a filename as-is;
+                # EXIF rotation is applied by the page transform, not the pixels
+                img_width, img_height = img.size
+                rotation = EXIF_ROTATIONS.get(orientation, 0)
+                if rotation in (90, 270):
+                    img_width, img_height = img_height, img_width  # Displayed size
+                return str(jpg_path), img_width, img_height, rotation
+            
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when the source is
+            # far larger than the page needs at target_dpi
+            if img.format == 'JPEG':
+                draft_side = max(self.target_width, self.target_height)
+                img.draft('RGB', (draft_side, draft_side))
+            
+            # Decode exactly once, up front
+            img.load()
             
             # Convert to RGB if necessary
             if img.mode != 'RGB':
                 img = img.convert('RGB')
             
-            # Auto-orient based on EXIF data
-            try:
-                img = ImageOps.exif_transpose(img)
-            except:
-                pass  # Ignore EXIF errors
-            
-            # Calculate optimal size for the PDF
-            usable_width = self.page_width - (2 * self.margin)
-            usable_height = self.page_height - (2 * self.margin)
+            # Auto-orient based on EXIF data; the orientation was already
+            # read, and exif_transpose would copy even upright images
+            if orientation != 1:
+                try:
+                    img = ImageOps.exif_transpose(img)
+                except:
+                    pass  # Ignore EXIF errors
             
-            img_aspect = img.width / img.height
-            page_aspect = usable_width / usable_height
+            # Don't embed more pixels than the page can show at target_dpi
+            if (img.width > self.target_width * 1.1
+                    or img.height > self.target_height * 1.1):
+                img.thumbnail((self.target_width, self.target_height),
+                              Image.Resampling.LANCZOS)
             
-            if img_aspect > page_aspect:
-                pdf_width = usable_width
-                pdf_height = usable_width / img_aspect
+            # Re-encode as JPEG so the page gets a /DCTDecode image rather
+            # than a much larger Flate-compressed raw bitmap
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=JPEG_REENCODE_QUALITY, optimize=True)
+            return buffer.getvalue(), img.width, img.height, 0
+    
+    def draw_jpg_page(self, c: canvas.Canvas, page_image: Tuple[Union[str, bytes], int, int, int]) -> None:
+        """Draw a JPG loaded by load_jpg_page as the next page of the canvas."""
+        source, img_width, img_height, rotation = page_image
+        image = source if isinstance(source, str) else ImageReader(io.BytesIO(source))
+        self.draw_image_page(c, image, img_width, img_height, rotation)
+        c.showPage()
+    
+    def convert_jpgs_to_pdf_working(self, jpg_paths: List[Path],
+                                    output_path: Optional[Path]) -> Tuple[List[bool], Optional[bytes]]:
+        """Convert JPG images to one letter-sized PDF, one page per image.
+
+        Returns whether each image made it into the PDF (images that fail
+        are left out) and, when output_path is None, the PDF data itself.
+        """
+        # Load every image before drawing: unreadable files fail here, while
+        # the canvas is still untouched, and are simply left out
+        page_images = []
+        for jpg_path in jpg_paths:
+            try:
+                page_images.append(self.load_jpg_page(jpg_path))
+            except Exception as e:
+                print(f"✗ Error converting {jpg_path.name}: {e}")
+                page_images.append(None)
+        
+        failed = {index for index, page_image in enumerate(page_images) if page_image is None}
+        while True:
+            # Only a failed draw can leave a half-drawn page on the canvas, so
+            # the batch is drawn again on a fresh canvas without that image;
+            # loaded images are reused rather than decoded again
+            buffer = io.BytesIO()
+            c = canvas.Canvas(buffer, pagesize=self.page_size)
+            results = []
+            for index, (jpg_path, page_image) in enumerate(zip(jpg_paths, page_images)):
+                if index in failed:
+                    results.append(False)
+                    continue
+                try:
+                    self.draw_jpg_page(c, page_image)
+                    results.append(True)
+                except Exception as e:
+                    print(f"✗ Error converting {jpg_path.name}: {e}")
+                    failed.add(index)
+                    break
             else:
-                pdf_height = usable_height
-                pdf_width = usable_height * img_aspect
-            
-            # Calculate position to center the image
-            x = self.margin + (usable_width - pdf_width) / 2
-            y = self.margin + (usable_height - pdf_height) / 2
-            
-            # Create PDF using PyPDF2
-            writer = PdfWriter()
-            
-            # Add a blank page
-            page = writer.add_blank_page(width=self.page_width, height=self.page_height)
-            
-            # Convert image to bytes
-            img_bytes = io.BytesIO()
-            img.save(img_bytes, format='PNG')
-            
-            # Add image to the page
-            page.insert_image(img_bytes.getvalue(), x=x, y=y, width=pdf_width, height=pdf_height)
-            
-            # Save the PDF
-            with open(output_path, 'wb') as f:
-                writer.write(f)
+                break
+        
+        if not any(results):
+            return results, None
+        
+        try:
+            c.save()
+            pdf_data = buffer.getvalue()
             
             # Verify the PDF was created properly
-            if output_path.exists() and output_path.stat().st_size > 1000:  # Should be larger than 1KB
-                return True
+            if len(pdf_data) <= 1000:  # Should be larger than 1KB
+                print(f"⚠ Warning: PDF for {', '.join(path.name for path in jpg_paths)} is too small ({len(pdf_data)} bytes)")
+            elif output_path is None:
+                return results, pdf_data
             else:
-                print(f"⚠ Warning: {jpg_path.name} created small PDF ({output_path.stat().st_size} bytes)")
-                return False
-            
+                # Cached pages are reused as long as their JPG is unchanged, so
+                # write aside and swap in atomically; a run killed mid-write
+                # must not leave a truncated page behind
+                partial_path = output_path.with_suffix(f".{os.getpid()}.tmp")
+                partial_path.write_bytes(pdf_data)
+                os.replace(partial_path, output_path)
+                return results, None
         except Exception as e:
-            print(f"✗ Error converting {jpg_path.name}: {e}")
+            print(f"✗ Error writing PDF for {', '.join(path.name for path in jpg_paths)}: {e}")
+        return [False] * len(jpg_paths), None
+    
+    def convert_jpg_to_pdf_working(self, jpg_path: Path, output_path: Path) -> bool:
+        """Convert a JPG image to a letter-sized PDF using working method."""
+        results, _ = self.convert_jpgs_to_pdf_working([jpg_path], output_path)
+        return results[0]
+    
+    def page_cache_key(self, jpg_path: Path, stat: Optional[os.stat_result] = None) -> str:
+        """Key a converted page by its source identity and the page geometry."""
+        if stat is None:
+            stat = jpg_path.stat()
+        key = f"{jpg_path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{self.page_size}|{self.margin}|{self.target_dpi}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    
+    def pages_fit_in_memory(self, scan: Dict[str, Any]) -> bool:
+        """Whether a scan's converted pages are kept in memory rather than written out.
+
+        Cached runs always write pages to the cache; otherwise they stay in
+        memory unless the JPGs add up to more than IN_MEMORY_JPG_LIMIT bytes.
+        """
+        if self.cache_dir is not None:
             return False
+        entries = scan["entries"]
+        return sum(entries[path].stat().st_size for path in scan["jpgs"]) <= IN_MEMORY_JPG_LIMIT
     
-    def get_all_files_working(self, directory: Path, sort_by: str = "name") -> List[Path]:
-        """Get all image and PDF files, converting JPGs to PDFs with working method."""
-        all_files = []
-        temp_dir = directory / "_temp_pdfs_working"
-        temp_dir.mkdir(exist_ok=True)
+    def get_all_files_working(self, directory: Path, sort_by: str = "name",
+                              scan: Optional[Dict[str, Any]] = None,
+                              temp_dir: Optional[Path] = None) -> List[PdfSource]:
+        """Get all image and PDF files, converting JPGs to PDFs with working method.
+
+        Without a cache, each run of consecutive JPGs is drawn into a shared
+        PDF so the merge reads a few files instead of one per image. Those
+        PDFs stay in memory unless the JPGs add up to more than
+        IN_MEMORY_JPG_LIMIT bytes; then they are written to temp_dir
+        (default: _temp_pdfs_working in the input directory).
+        """
+        if scan is None:
+            scan = self.scan_directory(directory)
         
-        # Process all files
-        for file in directory.iterdir():
-            if not file.is_file():
-                continue
-            
-            # Skip cover and back cover files
-            if (file.name.lower() == self.cover_filename.lower() or 
-                file.name.lower() == self.back_cover_filename.lower()):
-                continue
-            
-            # Skip temp directory
-            if file.name == "_temp_pdfs_working":
-                continue
-            
-            if file.suffix.lower() in ['.jpg', '.jpeg']:
-                # Convert JPG to PDF with working method
-                pdf_path = temp_dir / f"{file.stem}.pdf"
-                if self.convert_jpg_to_pdf_working(file, pdf_path):
-                    all_files.append(pdf_path)
-                    print(f"✓ Converted: {file.name} -> PDF")
-                else:
-                    print(f"✗ Failed to convert: {file.name}")
-                    
-            elif file.suffix.lower() == '.pdf':
-                # Use existing PDF
-                all_files.append(file)
+        # Sort sources first; existing PDFs are used as-is (cover and back
+        # cover are already set aside) and JPGs are converted in that order
+        sources = scan["pdfs"] + scan["jpgs"]
         
-        # Sort files
+        # DirEntry.stat() caches its result, so each file is stat'ed at most
+        # once however many of the checks below need it
+        entries = scan["entries"]
         if sort_by.lower() == "name":
-            all_files.sort(key=lambda x: x.name.lower())
+            sources.sort(key=lambda path: natural_sort_key(path.name))
         elif sort_by.lower() == "date":
-            all_files.sort(key=lambda x: x.stat().st_ctime)
+            sources.sort(key=lambda path: entries[path].stat().st_ctime)
+        
+        if temp_dir is None:
+            temp_dir = directory / "_temp_pdfs_working"
+        in_memory = self.pages_fit_in_memory(scan)
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        elif not in_memory:
+            temp_dir.mkdir(exist_ok=True)
+        
+        # Split consecutive JPGs into batches: enough to keep every worker
+        # busy, small enough that one canvas doesn't hold too many images
+        jpg_count = len(scan["jpgs"])
+        batch_size = min(JPG_PAGES_PER_BATCH, max(1, -(-jpg_count // self.workers)))
+        
+        # Each slot is either a ready PDF or the index of a conversion job
+        slots: List[Any] = []
+        jpg_jobs: List[Tuple[List[Path], Path]] = []
+        for source in sources:
+            if source.suffix.lower() == ".pdf":
+                slots.append(source)
+                continue
+            if self.cache_dir is not None:
+                cache_key = self.page_cache_key(source, entries[source].stat())
+                pdf_path = self.cache_dir / f"{source.stem}-{cache_key}.pdf"
+                if pdf_path.exists():
+                    slots.append(pdf_path)
+                    print(f"✓ Cached: {source.name} -> PDF")
+                else:
+                    # Cached pages stay one file per image so they can be reused
+                    slots.append(len(jpg_jobs))
+                    jpg_jobs.append(([source], pdf_path))
+                continue
+            if (slots and isinstance(slots[-1], int)
+                    and len(jpg_jobs[slots[-1]][0]) < batch_size):
+                jpg_jobs[slots[-1]][0].append(source)
+            else:
+                slots.append(len(jpg_jobs))
+                jpg_jobs.append(([source], temp_dir / f"pages_{len(jpg_jobs):04d}.pdf"))
         
-        return all_files
+        # Convert batches in parallel; each is an independent, CPU-bound job
+        converted: List[Optional[PdfSource]] = [None] * len(jpg_jobs)
+        converted_count = 0
+        if jpg_jobs:
+            batch_paths = [jpg_paths for jpg_paths, _ in jpg_jobs]
+            # Batches kept in memory are named after their temp file but never written
+            pdf_paths = [None if in_memory else pdf_path for _, pdf_path in jpg_jobs]
+            workers = min(self.workers, len(jpg_jobs))
+            if workers > 1:
+                executor = ProcessPoolExecutor(max_workers=workers)
+                results = executor.map(self.convert_jpgs_to_pdf_working, batch_paths, pdf_paths)
+            else:
+                # Not worth spawning a pool for a single worker
+                executor = None
+                results = map(self.convert_jpgs_to_pdf_working, batch_paths, pdf_paths)
+            try:
+                for job_index, (jpg_paths, (batch_results, pdf_data)) in enumerate(zip(batch_paths, results)):
+                    for jpg_path, jpg_converted in zip(jpg_paths, batch_results):
+                        # Failures were already reported, with their cause, by the converter
+                        if jpg_converted:
+                            print(f"✓ Converted: {jpg_path.name} -> PDF")
+                            converted_count += 1
+                    if pdf_data is not None:
+                        pdf_stream = io.BytesIO(pdf_data)
+                        pdf_stream.name = jpg_jobs[job_index][1].name
+                        converted[job_index] = pdf_stream
+                    elif any(batch_results):
+                        converted[job_index] = jpg_jobs[job_index][1]
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+        
+        pages = []
+        for slot in slots:
+            if not isinstance(slot, int):
+                pages.append(slot)
+            elif converted[slot] is not None:
+                pages.append(converted[slot])
+        
+        # Batching merges several JPGs into one PDF, so count the sources
+        # that made it in rather than the PDFs returned
+        if pages:
+            source_count = converted_count + sum(not isinstance(slot, int) for slot in slots)
+            print(f"✓ Found {source_count} inner page files")
+        return pages
     
-    def merge_pdfs(self, pdf_paths: List[Path], output_path: Path) -> bool:
-        """Merge multiple PDF files into a single PDF using PyPDF2."""
+    def merge_pdfs(self, pdf_paths: List[PdfSource], output_path: PdfOutput,
+                   compress: bool = True) -> bool:
+        """Merge multiple PDF files into a single PDF using pypdf (or PyPDF2).
+
+        With compress, page content streams stored without a filter are
+        Flate-compressed before writing.
+        """
         try:
+            # Prefer pypdf, the maintained successor of PyPDF2 with the same API
+            try:
+                from pypdf import PdfReader, PdfWriter
+                from pypdf.generic import NameObject
+            except ImportError:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", DeprecationWarning)
+                    from PyPDF2 import PdfReader, PdfWriter
+                    from PyPDF2.generic import NameObject
+            
             writer = PdfWriter()
             
             for pdf_path in pdf_paths:
                 try:
-                    reader = PdfReader(str(pdf_path))
+                    reader = PdfReader(pdf_path)
                     
                     # Validate that PDF has pages
-                    if len(reader.pages) == 0:
+                    page_count = len(reader.pages)
+                    if page_count == 0:
                         print(f"⚠ Warning: {pdf_path.name} has no pages, skipping")
                         continue
                     
-                    # Add all pages from this PDF
-                    for page in reader.pages:
-                        writer.add_page(page)
-                    print(f"✓ Added: {pdf_path.name} ({len(reader.pages)} pages)")
+                    # Copy all pages in one call; keep annotations like add_page did
+                    writer.append(reader, import_outline=False, excluded_fields=())
+                    print(f"✓ Added: {pdf_path.name} ({page_count} pages)")
                 except Exception as e:
                     print(f"✗ Error reading {pdf_path.name}: {e}")
                     continue
+                finally:
+                    # The writer holds its own copy of every appended object, so
+                    # in-memory sources can be freed now rather than after the
+                    # whole catalog has been written
+                    if isinstance(pdf_path, io.BytesIO):
+                        pdf_path.close()
             
             # Check if any pages were added
             if len(writer.pages) == 0:
                 print("✗ No valid pages were added to PDF")
                 return False
             
+            if compress:
+                # Compress unfiltered content streams in place: replacing them
+                # (page.compress_content_streams) leaves the old stream in the
+                # writer, which still writes it out
+                for page in writer.pages:
+                    contents = page.get("/Contents")
+                    if contents is None:
+                        continue
+                    contents = contents.get_object()
+                    for stream in (contents if isinstance(contents, list) else [contents]):
+                        stream = stream.get_object()
+                        if "/Filter" not in stream:
+                            stream.set_data(zlib.compress(stream.get_data()))
+                            stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+            
             # Write merged PDF
             try:
-                print(f"⚠ Saving merged PDF to: {output_path} (this can take several minutes depending on the number of pages and file sizes)...")
-                with open(output_path, 'wb') as output_file:
+                print(f"⚠ Saving merged PDF to: {self.describe_output(output_path)} (this can take several minutes depending on the number of pages and file sizes)...")
+                if not isinstance(output_path, Path):
+                    # Streams are written to directly; buffering is up to the caller
+                    writer.write(output_path)
+                    print(f"✓ Total pages in merged PDF: {len(writer.pages)}")
+                    return True
+                
+                # The writer emits one small write per object; a 4 MiB buffer coalesces them
+                with open(output_path, 'wb', buffering=4 << 20) as output_file:
                     writer.write(output_file)
                 
                 # Verify file was created and has content
@@ -262,46 +578,96 @@ class WorkingFixPDFCatalogMerger:
             print(f"✗ Error merging PDFs: {e}")
             return False
 
-    def merge_pdfs_pikepdf(self, pdf_paths: List[Path], output_path: Path) -> bool:
-        if pikepdf is None:
-            print("✗ pikepdf is not installed. Install with: pip install pikepdf")
+    def describe_output(self, output_path: PdfOutput) -> str:
+        """Name a merge output for messages: the path, or the stream's name."""
+        if isinstance(output_path, Path):
+            return str(output_path)
+        return getattr(output_path, "name", "stream")
+    
+    def dedupe_images(self, pdf: Any) -> int:
+        """Point every use of a byte-identical image at one copy in a pikepdf Pdf."""
+        seen: Dict[Tuple[bytes, bytes], Any] = {}
+        keys: Dict[Tuple[int, int], Tuple[bytes, bytes]] = {}
+        replaced = 0
+        for page in pdf.pages:
+            resources = page.obj.get("/Resources")
+            xobjects = resources.get("/XObject") if resources is not None else None
+            if xobjects is None:
+                continue
+            for name, xobject in list(xobjects.items()):
+                if not xobject.is_indirect or xobject.get("/Subtype") != "/Image":
+                    continue
+                # Hash each image object once, however many pages use it
+                key = keys.get(xobject.objgen)
+                if key is None:
+                    key = (xobject.stream_dict.unparse(),
+                           hashlib.blake2b(xobject.read_raw_bytes(), digest_size=16).digest())
+                    keys[xobject.objgen] = key
+                first = seen.setdefault(key, xobject)
+                if first.objgen != xobject.objgen:
+                    xobjects[name] = first
+                    replaced += 1
+        return replaced
+    
+    def merge_pdfs_pikepdf(self, pdf_paths: List[PdfSource], output_path: PdfOutput,
+                           linearize: bool = False) -> bool:
+        try:
+            import pikepdf
+        except Exception as e:
+            print(f"✗ pikepdf could not be imported ({e}). Install with: pip install pikepdf")
             return False
 
-        merged = pikepdf.Pdf.new()
-
-        for idx, pdf_path in enumerate(pdf_paths, start=1):
-            print(f"[{idx}/{len(pdf_paths)}] Adding: {pdf_path.name}")
-            try:
-                with pikepdf.Pdf.open(str(pdf_path)) as part:
-                    merged.pages.extend(part.pages)
-            except Exception as e:
-                # Fallback: try to rewrite/sanitize this single PDF, then re-open
+        with pikepdf.Pdf.new() as merged:
+            for idx, pdf_path in enumerate(pdf_paths, start=1):
+                print(f"[{idx}/{len(pdf_paths)}] Adding: {pdf_path.name}")
                 try:
-                    import tempfile
-                    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-                        tmp_path = Path(tmp.name)
+                    # Memory-map the source so qpdf only pages in the objects it copies
+                    with pikepdf.Pdf.open(pdf_path, access_mode=pikepdf.AccessMode.mmap) as part:
+                        merged.pages.extend(part.pages)
+                except Exception as e:
+                    # Fallback: let qpdf rewrite (and so repair) this single PDF,
+                    # then re-open the result; both steps stay in memory
                     try:
-                        with pikepdf.Pdf.open(str(pdf_path)) as src:
-                            src.save(str(tmp_path))
-                        with pikepdf.Pdf.open(str(tmp_path)) as part:
+                        if isinstance(pdf_path, io.BytesIO):
+                            pdf_path.seek(0)
+                        sanitized = io.BytesIO()
+                        with pikepdf.Pdf.open(pdf_path) as src:
+                            src.save(sanitized)
+                        sanitized.seek(0)
+                        with pikepdf.Pdf.open(sanitized) as part:
                             merged.pages.extend(part.pages)
-                    finally:
-                        try:
-                            tmp_path.unlink(missing_ok=True)
-                        except Exception:
-                            pass
-                except Exception as e2:
-                    print(f"✗ Error adding {pdf_path.name} with pikepdf: {e}")
-                    print(f"✗ Fallback sanitize also failed for {pdf_path.name}: {e2}")
-                    return False
+                    except Exception as e2:
+                        print(f"✗ Error adding {pdf_path.name} with pikepdf: {e}")
+                        print(f"✗ Fallback sanitize also failed for {pdf_path.name}: {e2}")
+                        return False
+                
+                # The merged Pdf keeps its own copy of what it took from the
+                # source, so in-memory sources can be freed right away
+                if isinstance(pdf_path, io.BytesIO):
+                    pdf_path.close()
+
+            # Repeated images (a logo on every page, the same photo twice) are
+            # written once; qpdf drops the copies nothing refers to any more
+            duplicates = self.dedupe_images(merged)
+            if duplicates:
+                print(f"✓ Shared {duplicates} duplicate image(s)")
 
-        # Save once at the end (linearize can take time on large files)
-        print(f"⚠ Saving merged PDF to: {output_path} (this can take several minutes depending on the number of pages and file sizes)...")
-        merged.save(str(output_path), linearize=True)
+            # Save once at the end as a single sequential write; object streams
+            # (PDF 1.5) keep the xref compact for catalogs with many pages.
+            # Linearizing costs a second pass, so it is only done on request.
+            # Already-compressed streams are copied as-is rather than inflated
+            # and deflated again; uncompressed ones still get Flate
+            print(f"⚠ Saving merged PDF to: {self.describe_output(output_path)} (this can take several minutes depending on the number of pages and file sizes)...")
+            merged.save(str(output_path) if isinstance(output_path, Path) else output_path,
+                        linearize=linearize, object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                        stream_decode_level=pikepdf.StreamDecodeLevel.none)
+        if not isinstance(output_path, Path):
+            return True
         return output_path.exists() and output_path.stat().st_size > 0
     
     def create_catalog(self, input_directory: Path, output_file: str, 
-                      sort_by: str = "name", engine: str = "auto") -> bool:
+                      sort_by: str = "name", engine: str = "auto",
+                      linearize: bool = False) -> bool:
         """Create a catalog by converting images and merging PDFs."""
         print(f"Creating WORKING catalog from: {input_directory}")
         print(f"Sorting inner pages by: {sort_by}")
@@ -311,69 +677,75 @@ class WorkingFixPDFCatalogMerger:
         # Create output path early so we can exclude it from inputs
         output_path = input_directory / output_file if not Path(output_file).is_absolute() else Path(output_file)
         
-        # Find cover files
-        cover_path, back_cover_path = self.find_cover_files(input_directory)
+        # Walk the directory once and share the result
+        scan = self.scan_directory(input_directory)
         
-        # Get all files (converting JPGs to PDFs with working method)
-        inner_pages = self.get_all_files_working(input_directory, sort_by)
-
-        # Avoid recursively merging previously-created catalogs
+        # Avoid recursively merging previously-created catalogs; filtering the
+        # scanned PDFs checks each name once and leaves converted pages alone
         excluded_pdf_names = {
             "working_catalog.pdf",
             "catalog.pdf",
             output_path.name.lower(),
         }
-        inner_pages = [p for p in inner_pages if p.name.lower() not in excluded_pdf_names]
+        scan["pdfs"] = [path for path in scan["pdfs"] if path.name.lower() not in excluded_pdf_names]
         
-        if not inner_pages:
-            print("⚠ No inner page files found")
-            if not cover_path and not back_cover_path:
-                print("✗ No files found in directory")
-                return False
-        
-        print(f"✓ Found {len(inner_pages)} inner page files")
-        
-        # Build the complete list of files in order
-        pdf_order = []
-        
-        # Add cover first
-        if cover_path:
-            pdf_order.append(cover_path)
-        
-        # Add inner pages
-        pdf_order.extend(inner_pages)
-        
-        # Add back cover last
-        if back_cover_path:
-            pdf_order.append(back_cover_path)
-        
-        print(f"\nMerging {len(pdf_order)} files...")
+        # Find cover files
+        cover_path, back_cover_path = self.find_cover_files(input_directory, scan)
         
-        selected_engine = engine
-        if selected_engine == "auto":
-            selected_engine = "pikepdf" if pikepdf is not None else "pypdf2"
-
-        merged_ok = False
-        if selected_engine == "pikepdf":
-            merged_ok = self.merge_pdfs_pikepdf(pdf_order, output_path)
+        # Intermediate page PDFs that don't fit in memory go to a temp folder
+        # outside the input directory; it is removed even if the merge fails.
+        # Only create it when pages will spill: cached runs write to the
+        # cache, and PDF-only folders and small JPG sets stay in memory
+        if self.cache_dir is None and not self.pages_fit_in_memory(scan):
+            temp_context = tempfile.TemporaryDirectory(prefix="pdfcat_")
         else:
-            merged_ok = self.merge_pdfs(pdf_order, output_path)
-
-        if merged_ok:
-            print(f"\n✓ WORKING Catalog created successfully: {output_path}")
-            print(f"Total pages: {len(pdf_order)} files merged")
-            print("✅ Catalog created!")
+            temp_context = contextlib.nullcontext()
+        with temp_context as temp_dir:
+            # Get all files (converting JPGs to PDFs with working method)
+            inner_pages = self.get_all_files_working(input_directory, sort_by, scan,
+                                                     Path(temp_dir) if temp_dir else None)
             
-            # Clean up temp files
-            temp_dir = input_directory / "_temp_pdfs_working"
-            if temp_dir.exists():
-                import shutil
-                shutil.rmtree(temp_dir)
-                print("✓ Cleaned up temporary files")
+            if not inner_pages:
+                print("⚠ No inner page files found")
+                if not cover_path and not back_cover_path:
+                    print("✗ No files found in directory")
+                    return False
             
-            return True
-        else:
-            return False
+            # Build the complete list of files in order
+            pdf_order = []
+            
+            # Add cover first
+            if cover_path:
+                pdf_order.append(cover_path)
+            
+            # Add inner pages
+            pdf_order.extend(inner_pages)
+            
+            # Add back cover last
+            if back_cover_path:
+                pdf_order.append(back_cover_path)
+            
+            print(f"\nMerging {len(pdf_order)} files...")
+            
+            selected_engine = engine
+            if selected_engine == "auto":
+                selected_engine = "pikepdf" if pikepdf_available() else "pypdf2"
+
+            merged_ok = False
+            if selected_engine == "pikepdf":
+                merged_ok = self.merge_pdfs_pikepdf(pdf_order, output_path, linearize)
+            else:
+                if linearize:
+                    print("⚠ Linearizing needs the pikepdf engine; saving a regular PDF")
+                merged_ok = self.merge_pdfs(pdf_order, output_path)
+
+            if merged_ok:
+                print(f"\n✓ WORKING Catalog created successfully: {output_path}")
+                print(f"Total pages: {len(pdf_order)} files merged")
+                print("✅ Catalog created!")
+                return True
+            else:
+                return False
 
 
 def main():
@@ -403,6 +775,14 @@ Examples:
 
     parser.add_argument("--engine", type=str, choices=["auto", "pypdf2", "pikepdf"], default="auto",
                         help="Merge engine: auto prefers pikepdf if installed (default: auto)")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="Number of processes used to convert JPGs (default: one per CPU)")
+    parser.add_argument("--dpi", type=int, default=300,
+                        help="Resolution for JPGs that have to be re-encoded (default: 300)")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Keep converted JPG pages and generated covers here and reuse them on later runs")
+    parser.add_argument("--linearize", action="store_true",
+                        help="Optimize the catalog for fast web view (pikepdf only; slower to save)")
     
     args = parser.parse_args()
     
@@ -416,14 +796,25 @@ Examples:
         print(f"Error: {input_dir} is not a directory")
         sys.exit(1)
     
+    if args.workers is not None and args.workers < 1:
+        print("Error: workers must be at least 1")
+        sys.exit(1)
+    
+    if args.dpi < 1:
+        print("Error: dpi must be at least 1")
+        sys.exit(1)
+    
     # Create merger and process
     try:
-        merger = WorkingFixPDFCatalogMerger()
+        cache_dir = Path(args.cache_dir) if args.cache_dir else None
+        merger = WorkingFixPDFCatalogMerger(cache_dir=cache_dir, workers=args.workers,
+                                            target_dpi=args.dpi)
         success = merger.create_catalog(
             input_directory=input_dir,
             output_file=args.output,
             sort_by=args.sort,
-            engine=args.engine
+            engine=args.engine,
+            linearize=args.linearize
         )
         
         if success: